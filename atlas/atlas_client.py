@@ -1,7 +1,22 @@
-from .http_client import AtlasHTTPClient, AtlasHTTPError
+from .http_client import AtlasHTTPClient, AtlasHTTPError, _loads, _stream_loads
 from .models import AggregateBy, Facility, Device, HistoricalValues, HourlyRates
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Tuple
+from pydantic import TypeAdapter
+import time
+
+# Validates a whole facility-readings response in a single pydantic-core call
+_historical_values_adapter = TypeAdapter(List[HistoricalValues])
+
+def _iso_z(dt: datetime) -> str:
+    """
+    Format a datetime as YYYY-MM-DDTHH:MM:SSZ, the format expected by the
+    ATLAS API for query parameters and request bodies. Aware datetimes are
+    converted to UTC first, naive datetimes are assumed to already be UTC.
+    """
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d}T{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}Z"
 
 class AtlasClient:
     """
@@ -12,6 +27,7 @@ class AtlasClient:
             self,
             refresh_token: Optional[str] = None,
             debug: Optional[bool] = False,
+            facilities_cache_ttl: float = 300,
     ):
         """
         Parameters
@@ -23,13 +39,24 @@ class AtlasClient:
             config file ~/.config/atlas/config.toml
         debug : Optional[bool], optional
             enable debug logging, by default False
+        facilities_cache_ttl : float, optional
+            number of seconds list_facilities results are cached for, by
+            default 300, 0 disables caching
         """
         self.client = AtlasHTTPClient(refresh_token=refresh_token, debug=debug)
         self.client.refresh_access_token()
+        self._facilities_cache_ttl = facilities_cache_ttl
+        self._facilities_cache: Optional[Tuple[float, List[Facility]]] = None
 
-    def list_facilities(self) -> List[Facility]:
+    def list_facilities(self, force_refresh: bool = False) -> List[Facility]:
         """
-        List facilities the logged in user has access to.
+        List facilities the logged in user has access to. Results are cached
+        for facilities_cache_ttl seconds as facility metadata rarely changes.
+
+        Parameters
+        ----------
+        force_refresh : bool, optional
+            ignore cached results and retrieve the facilities, by default False
 
         Returns
         -------
@@ -41,14 +68,15 @@ class AtlasClient:
         AtlasHTTPError
             Raised if an error occurs while making the request
         """
+        cache = self._facilities_cache
+        if not force_refresh and cache and time.monotonic() - cache[0] < self._facilities_cache_ttl:
+            return list(cache[1])
+
         url = f"/users/{self.client.get_user_id()}/facilities?view=extended"
         response = self.client.request("GET", url)
-        try:
-            facilities = response.json()
-        except ValueError as e:
-            raise AtlasHTTPError(f"{e}, got {response}", response=response)
-
-        return [Facility(**facility) for facility in facilities]
+        facilities = [Facility(**facility) for facility in _loads(response)]
+        self._facilities_cache = (time.monotonic(), facilities)
+        return list(facilities)
 
     def list_devices(self, org_id: str, agent_id: str) -> List[Device]:
         """
@@ -72,11 +100,8 @@ class AtlasClient:
             Raised if an error occurs while making the request
         """
         url = f"/orgs/{org_id}/agents/{agent_id}/devices"
-        try:
-            response = self.client.request("GET", url)
-            devices = response.json()
-        except ValueError as e:
-            raise AtlasHTTPError(f"{e}, got {response}", response=response)
+        response = self.client.request("GET", url)
+        devices = _loads(response)
 
         return [Device(**device) for device in devices.get("values", [])]
 
@@ -110,11 +135,8 @@ class AtlasClient:
         """
         url = f"/orgs/{org_id}/agents/{agent_id}/point-ids"
         payload = { "names": point_aliases }
-        try:
-            response = self.client.request("POST", url, json=payload)
-            return response.json()
-        except ValueError as e:
-            raise AtlasHTTPError(f"{e}, got {response}", response=response)
+        response = self.client.request("POST", url, json=payload)
+        return _loads(response)
 
     def get_historical_values(
             self,
@@ -163,22 +185,88 @@ class AtlasClient:
         AtlasHTTPError
             Raised if an error occurs while making the request
         """
+        try:
+            response = self._request_historical_values(org_id, agent_id, point_ids, start, end, interval, aggregate_by, changes_only, scaled)
+            return _historical_values_adapter.validate_python(_stream_loads(response))
+        except ValueError as e:
+            raise AtlasHTTPError(f"{e}, got {response}", response=response)
+
+    def get_historical_values_raw(
+            self,
+            org_id: str,
+            agent_id: str,
+            point_ids: List[str],
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None,
+            interval: int = 60,
+            aggregate_by: List[AggregateBy] = ["avg"],
+            changes_only: bool = False,
+            scaled: bool = True,
+    ) -> List[Dict]:
+        """
+        Get historical point values as parsed JSON without validating them
+        against the HistoricalValues model. Use this when reading large time
+        ranges and the values are consumed directly, otherwise prefer
+        get_historical_values.
+
+        Parameters
+        ----------
+        org_id : str
+            organization ID associated with the facility as returned by list_facilities
+        agent_id : str
+            agent ID associated with the facility as returned by list_facilities
+        point_ids : List[str]
+            list of point IDs to return historical values for as returned by get_point_ids
+        start : Optional[datetime], optional
+            start time for the query, by default 10 minutes ago
+        end : Optional[datetime], optional
+            end time for the query, by default now
+        interval : int, optional
+            sample interval in seconds, by default 60
+        aggregate_by : List[AggregateBy], optional
+            list of aggregation methods, by default ["avg"]
+        changes_only : bool, optional
+            only return data points where the value has changed, by default False
+        scaled : bool, optional
+            return analog data in physical units, by default True
+
+        Returns
+        -------
+        List[Dict]
+            list of historical values with the same structure as HistoricalValues
+
+        Raises
+        ------
+        AtlasHTTPError
+            Raised if an error occurs while making the request
+        """
+        response = self._request_historical_values(org_id, agent_id, point_ids, start, end, interval, aggregate_by, changes_only, scaled)
+        return _stream_loads(response)
+
+    def _request_historical_values(
+            self,
+            org_id: str,
+            agent_id: str,
+            point_ids: List[str],
+            start: Optional[datetime],
+            end: Optional[datetime],
+            interval: int,
+            aggregate_by: List[AggregateBy],
+            changes_only: bool,
+            scaled: bool,
+    ):
         url = f"/orgs/{org_id}/agents/{agent_id}/facility-readings"
+        now = datetime.now(timezone.utc)
         payload = {
             "point_ids": point_ids,
-            "start": start.strftime("%Y-%m-%dT%H:%M:%SZ") if start else (datetime.now() - timedelta(minutes=10)).strftime("%Y-%m-%dT%H:%M:%SZ"),
-            "end": end.strftime("%Y-%m-%dT%H:%M:%SZ") if end else datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "start": _iso_z(start or now - timedelta(minutes=10)),
+            "end": _iso_z(end or now),
             "interval": interval,
             "aggregate_by": aggregate_by,
             "changes_only": changes_only,
             "scaled": scaled,
         }
-        try:
-            response = self.client.request("POST", url, json=payload)
-            values = response.json()
-            return [HistoricalValues(**value) for value in values]
-        except ValueError as e:
-            raise AtlasHTTPError(f"{e}, got {response}", response=response)
+        return self.client.request("POST", url, json=payload, stream=True)
     
     def get_hourly_rates(
             self,
@@ -212,13 +300,14 @@ class AtlasClient:
             Raised if an error occurs while making the request
         """
         url = f"/orgs/{org_id}/agents/{agent_id}/rates"
+        now = datetime.now(timezone.utc)
         params = {
-            "since": since.strftime("%Y-%m-%dT%H:%M:%SZ") if since else (datetime.now() - timedelta(hours=24)).strftime("%Y-%m-%dT%H:%M:%SZ"),
-            "until": until.strftime("%Y-%m-%dT%H:%M:%SZ") if until else datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "since": _iso_z(since or now - timedelta(hours=24)),
+            "until": _iso_z(until or now),
         }
         try:
             response = self.client.request("GET", url, params=params)
-            return HourlyRates(**response.json())
+            return HourlyRates(**_loads(response))
         except ValueError as e:
             raise AtlasHTTPError(f"{e}, got {response}", response=response)
 
@@ -231,9 +320,10 @@ class AtlasClient:
         if not filter:
             return all_facilities
 
-        facilities = [f for f in all_facilities if f.short_name in filter]
+        short_names = set(filter)
+        facilities = [f for f in all_facilities if f.short_name in short_names]
         if len(facilities) != len(filter):
-            not_found = set(filter) - set(f.short_name for f in facilities)
+            not_found = short_names - set(f.short_name for f in facilities)
             raise Exception(f"Facilities {', '.join(not_found)} not found")
 
         return facilities
\ No newline at end of file
@@ -1,9 +1,11 @@
-from datetime import datetime, timedelta
+from datetime import timedelta
 from os import environ
 from pathlib import Path
 from typing import Optional, Union
 from urllib.parse import urljoin
-import logging, requests, tomli
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+import logging, orjson, requests, threading, time, tomli
 
 
 class AtlasConfigError(Exception):
@@ -26,6 +28,41 @@ class AtlasHTTPError(requests.HTTPError):
         self.response = response
 
 
+def _loads(response: requests.Response):
+    """
+    Deserialize the JSON body of a response using orjson.
+
+    Raises
+    ------
+    AtlasHTTPError
+        Raised if the response body is not valid JSON
+    """
+    try:
+        return orjson.loads(response.content)
+    except orjson.JSONDecodeError as e:
+        raise AtlasHTTPError(f"{e}, got {response}", response=response) from e
+
+
+def _stream_loads(response: requests.Response):
+    """
+    Deserialize the JSON body of a response made with stream=True.
+
+    The body is read straight from the underlying connection and released as
+    soon as it is parsed rather than being kept on the response, and the
+    connection is returned to the pool.
+
+    Raises
+    ------
+    AtlasHTTPError
+        Raised if the response body is not valid JSON
+    """
+    try:
+        with response:
+            return orjson.loads(response.raw.read(decode_content=True))
+    except orjson.JSONDecodeError as e:
+        raise AtlasHTTPError(f"{e}, got {response}", response=response) from e
+
+
 class AtlasHTTPClient(requests.Session):
 
     BASE_URL = "https://atlaslive.io"
@@ -40,6 +77,17 @@ class AtlasHTTPClient(requests.Session):
     EXPIRES_IN = "expires_in"
     AUTHORIZATION = "Authorization"
     BEARER = "Bearer"
+    JSON = "json"
+    DATA = "data"
+    CONTENT_TYPE = "Content-Type"
+    APPLICATION_JSON = "application/json"
+    JSON_HEADERS = {CONTENT_TYPE: APPLICATION_JSON}
+    JSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_OMIT_MICROSECONDS
+    POOL_CONNECTIONS = 4
+    POOL_MAXSIZE = 32
+    MAX_RETRIES = 3
+    RETRY_BACKOFF_FACTOR = 0.2
+    RETRY_STATUS_FORCELIST = [429, 502, 503, 504]
 
     def __init__(
         self,
@@ -57,13 +105,34 @@ class AtlasHTTPClient(requests.Session):
             config file ~/.config/atlas/config.toml
         """
         super().__init__(**kwargs)
+        # keep connections to the ATLAS host alive across requests, the
+        # final response is returned once retries are exhausted so that
+        # request() can surface it as an AtlasHTTPError. POST is retried as
+        # well, the point-ids and facility-readings POSTs are read-only
+        # queries.
+        adapter = HTTPAdapter(
+            pool_connections=self.POOL_CONNECTIONS,
+            pool_maxsize=self.POOL_MAXSIZE,
+            max_retries=Retry(
+                total=self.MAX_RETRIES,
+                backoff_factor=self.RETRY_BACKOFF_FACTOR,
+                status_forcelist=self.RETRY_STATUS_FORCELIST,
+                allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {"POST"},
+                raise_on_status=False,
+            ),
+        )
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
         self._refresh_token = self._get_refresh_token(refresh_token)
         self._auto_refresh_url = urljoin(self.BASE_URL, self.LOGIN_ENDPOINT)
         self._userinfo_url = urljoin(self.BASE_URL, self.USERINFO_ENDPOINT)
         self._api_url_prefix = urljoin(self.BASE_URL, "/api/front/v1")
         self._access_token = None
-        self._expires_at = datetime.now() - timedelta(days=1)
-        self._expiration_margin = timedelta(minutes=30)
+        self._auth_header = None
+        # monotonic clock time after which the access token must be refreshed
+        self._expires_at = float("-inf")
+        self._expiration_margin = timedelta(minutes=30).total_seconds()
+        self._refresh_lock = threading.Lock()
         if debug:
             logging.basicConfig(level=logging.DEBUG)
             logger = logging.getLogger("requests.packages.urllib3")
@@ -132,31 +201,50 @@ class AtlasHTTPClient(requests.Session):
             If the response from the auto refresh endpoint does not contain an
             access token or an expires in value.
         """
-        if (self._expires_at - datetime.now()) < self._expiration_margin:
-            auth = {
-                self.GRANT_TYPE: self.REFRESH_TOKEN,
-                self.REFRESH_TOKEN: self._refresh_token,
-            }
-            auth_response = requests.post(self._auto_refresh_url, data=auth, timeout=5)
-            auth_response.raise_for_status()
-            response_json = auth_response.json()
-            self._access_token = response_json.get(self.ACCESS_TOKEN, None)
-            expires_in = response_json.get(self.EXPIRES_IN, None)
-            if not self._access_token:
-                raise AuthError(
-                    f"Could not find {self.ACCESS_TOKEN} in response from {self._auto_refresh_url}",
-                    response=response_json,
-                )
-            if not expires_in:
-                raise AuthError(
-                    f"Could not find {self.EXPIRES_IN} in response from {self._auto_refresh_url}",
-                    response=response_json,
-                )
-            self._expires_at = datetime.now() + timedelta(seconds=expires_in)
-            userinfo = requests.get(self._userinfo_url, headers={self.AUTHORIZATION: f"{self.BEARER} {self._access_token}"})
-            userinfo.raise_for_status()
-            data = userinfo.json()
-            self._user_id = data.get("sub", None)
+        if time.monotonic() >= self._expires_at:
+            with self._refresh_lock:
+                # another thread may have refreshed the token while we waited
+                if time.monotonic() >= self._expires_at:
+                    self._refresh_access_token()
+
+    def _refresh_access_token(self):
+        auth = {
+            self.GRANT_TYPE: self.REFRESH_TOKEN,
+            self.REFRESH_TOKEN: self._refresh_token,
+        }
+        # bypass request() so the auth calls reuse the session pool
+        # without going through the token refresh and API URL prefix, the
+        # current (possibly expired) bearer token is not sent to the login
+        # endpoint
+        auth_response = super().request(
+            "POST",
+            self._auto_refresh_url,
+            data=auth,
+            headers={self.AUTHORIZATION: None},
+            timeout=5,
+        )
+        auth_response.raise_for_status()
+        response_json = auth_response.json()
+        self._access_token = response_json.get(self.ACCESS_TOKEN, None)
+        expires_in = response_json.get(self.EXPIRES_IN, None)
+        if not self._access_token:
+            raise AuthError(
+                f"Could not find {self.ACCESS_TOKEN} in response from {self._auto_refresh_url}",
+                response=response_json,
+            )
+        if not expires_in:
+            raise AuthError(
+                f"Could not find {self.EXPIRES_IN} in response from {self._auto_refresh_url}",
+                response=response_json,
+            )
+        self._auth_header = f"{self.BEARER} {self._access_token}"
+        # session headers are merged into every request made by the session
+        self.headers[self.AUTHORIZATION] = self._auth_header
+        self._expires_at = time.monotonic() + expires_in - self._expiration_margin
+        userinfo = super().request("GET", self._userinfo_url)
+        userinfo.raise_for_status()
+        data = userinfo.json()
+        self._user_id = data.get("sub", None)
 
 
     def request(self, method: str, url: str, **kwargs) -> requests.Response:
@@ -169,6 +257,9 @@ class AtlasHTTPClient(requests.Session):
             HTTP method, e.g. GET, POST, PUT, DELETE
         url : str
             URL to request
+        json : optional
+            JSON body, serialized with orjson. Datetimes are encoded as
+            RFC 3339 timestamps, naive datetimes are assumed to be UTC.
 
         Returns
         -------
@@ -183,10 +274,15 @@ class AtlasHTTPClient(requests.Session):
         try:
             self.refresh_access_token()
 
-            # call the underlying request method
-            kwargs[self.HEADERS] = {
-                self.AUTHORIZATION: f"{self.BEARER} {self._access_token}"
-            }
+            # call the underlying request method, the Authorization header
+            # is set on the session by refresh_access_token
+            # requests.Session.post always passes json=None, only a body
+            # that is actually set replaces data
+            body = kwargs.pop(self.JSON, None)
+            if body is not None:
+                kwargs[self.DATA] = orjson.dumps(body, option=self.JSON_OPTIONS)
+                headers = kwargs.get(self.HEADERS)
+                kwargs[self.HEADERS] = {**headers, **self.JSON_HEADERS} if headers else self.JSON_HEADERS
             response = super().request(method, self._api_url_prefix + url, **kwargs)
             response.raise_for_status()
         except requests.HTTPError as ex:
@@ -1,30 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
 import re
-from typing import Dict, List, Optional
 from pydantic import BaseModel
+from typing import Dict, List, Optional, Set, Tuple
 from .atlas_client import AtlasClient
-from .models import DeviceMetric, is_valid_metric
+from .models import Device, DeviceMetric, is_valid_metric
 
 class Filter(BaseModel):
     facilities: List[str]
     metrics: List[DeviceMetric]
 
-class MetricValue(BaseModel):
+@dataclass
+class MetricValue:
+    __slots__ = ("timestamp", "value")
     timestamp: datetime
     value: float
 
-class MetricValues(BaseModel):
+@dataclass
+class MetricValues:
+    __slots__ = ("metric", "device_name", "device_alias", "values")
     metric: DeviceMetric
     device_name: str
     device_alias: str
     values: List[MetricValue]
 
+@lru_cache(maxsize=128)
+def _compile_regexes(alias_regexes: Tuple[str, ...]) -> Tuple[re.Pattern, ...]:
+    """
+    Compile alias regular expressions, cached so repeated reads with the same
+    filter reuse the compiled patterns. Patterns are compiled separately as
+    joining them into one alternation would break inline flags, named groups
+    and backreferences.
+    """
+    return tuple(re.compile(alias_regex) for alias_regex in alias_regexes)
+
 class MetricsReader:
     """
     High level API Client for retrieving metrics point values from the ATLAS platform.
     """
 
+    MAX_WORKERS = 8
+
     def __init__(self, refresh_token: Optional[str] = None, debug: Optional[bool] = False):
         """
         Parameters
@@ -68,34 +87,73 @@ class MetricsReader:
         if not filter.metrics:
             raise Exception("No metrics provided")
 
+        invalid_metrics = [metric for metric in filter.metrics if not is_valid_metric(metric)]
+        if invalid_metrics:
+            raise Exception(f"Invalid metrics type {', '.join(str(metric) for metric in invalid_metrics)}")
+
+        # Group metric names and compiled alias patterns by device kind once
+        # rather than for every device of every facility
+        metrics_by_kind = defaultdict(list)
         for metric in filter.metrics:
-            if not is_valid_metric(metric):
-                raise Exception(f"Invalid metrics type {metric}")
+            metrics_by_kind[metric.device_kind.value].append(metric)
+        alias_matchers = {
+            kind: (
+                {metric.name for metric in metrics},
+                _compile_regexes(tuple(metric.alias_regex for metric in metrics if metric.alias_regex)),
+            )
+            for kind, metrics in metrics_by_kind.items()
+        }
 
         facilities = self.client.filter_facilities(filter.facilities)
 
         result = defaultdict(list)
-        for facility in facilities:
-            agent_id = facility.agents[0].agent_id
-            devices = self._get_devices(facility, agent_id)
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            futures = [
+                executor.submit(self._process_facility, facility, alias_matchers, start, end, interval)
+                for facility in facilities
+            ]
+            # collect in submission order so results follow the facility order
+            for future in futures:
+                short_name, values = future.result()
+                if values:
+                    result[short_name] = values
+
+        return result
 
-            for device in devices:
-                metrics_filter = [metric for metric in filter.metrics if metric.device_kind == device.kind]
-                if not metrics_filter:
-                    continue
+    def _process_facility(self, facility, alias_matchers: Dict[str, Tuple[Set[str], Tuple[re.Pattern, ...]]], start: Optional[datetime], end: Optional[datetime], interval: int):
+        agent_id = facility.agents[0].agent_id
+        devices = self._get_devices(facility, agent_id)
 
-                alias_filters = self._get_alias_filters(device, metrics_filter)
-                if not alias_filters:
-                    continue
-                
-                aliases = [af["alias"] for af in alias_filters]
+        # Collect the matching aliases of all devices so that the facility
+        # points are resolved and read with a single request each
+        alias_filters = []
+        alias_to_device = {}
+        for device in devices:
+            matcher = alias_matchers.get(device.kind)
+            if not matcher:
+                continue
 
-                point_map = self._get_point_ids(facility, agent_id, aliases)
-                hvalues = self._get_historical_values(facility, agent_id, point_map, start, end, interval)
+            device_filters = self._get_alias_filters(device, *matcher)
+            for af in device_filters:
+                alias_to_device[af["alias"]] = device
+            alias_filters.extend(device_filters)
 
-                self._process_historical_values(result, facility, device, alias_filters, point_map, hvalues)
+        if not alias_filters:
+            return facility.short_name, []
 
-        return result
+        aliases = list(alias_to_device)
+
+        point_map = self._get_point_ids(facility, agent_id, aliases)
+        hvalues = self._get_historical_values(facility, agent_id, point_map, start, end, interval)
+
+        try:
+            values = self._process_historical_values(alias_to_device, alias_filters, point_map, hvalues)
+        except (KeyError, TypeError, ValueError) as e:
+            # the raw response is not validated, report malformed payloads
+            # the same way as request errors
+            raise Exception(f"Error retrieving historical values for facility {facility.display_name}: {e!r}")
+
+        return facility.short_name, values
 
     def _get_devices(self, facility, agent_id: str) -> List:
         try:
@@ -103,25 +161,20 @@ class MetricsReader:
         except Exception as e:
             raise Exception(f"Error listing devices for facility {facility.display_name}: {e}")
 
-    def _get_alias_filters(self, device, metrics: List[DeviceMetric]) -> List[Dict[str, str]]:
+    def _get_alias_filters(self, device, metric_names: Set[str], metric_regexps: Tuple[re.Pattern, ...]) -> List[Dict[str, str]]:
         properties = device.properties
 
-        # Extract metric names and regex patterns
-        metric_names = {metric.name for metric in metrics}
-        metric_regexps = [re.compile(metric.alias_regex) for metric in metrics if metric.alias_regex]
-
         # Create initial filters based on metric names
         filters = [{"alias": prop.value.alias, "filter": prop.key} for prop in properties if prop.key in metric_names]
 
         # Add filters based on non-empty regex patterns
-        regex_filters = [
-            {"alias": prop.value.alias, "filter": prop.key}
-            for prop in properties
-            if any(pattern.match(prop.value.alias) for pattern in metric_regexps)
-        ]
-
-        # Append regex-based filters to the main filters list
-        filters.extend(regex_filters)
+        if metric_regexps:
+            filters.extend(
+                {"alias": prop.value.alias, "filter": prop.key}
+                for prop in properties
+                if any(pattern.match(prop.value.alias) for pattern in metric_regexps)
+            )
+
         return filters
 
 
@@ -141,21 +194,25 @@ class MetricsReader:
 
     def _get_historical_values(self, facility, agent_id: str, point_map: Dict[str, str], start: Optional[datetime], end: Optional[datetime], interval: int):
         try:
-            return self.client.get_historical_values(facility.organization_id, agent_id, list(point_map.values()), start, end, interval)
+            return self.client.get_historical_values_raw(facility.organization_id, agent_id, list(point_map.values()), start, end, interval)
         except Exception as e:
             raise Exception(f"Error retrieving historical values for facility {facility.display_name}: {e}")
 
-    def _process_historical_values(self, result: defaultdict, facility, device, alias_filters: List[Dict[str, str]], point_map: Dict[str, str], hvalues: List):
+    def _process_historical_values(self, alias_to_device: Dict[str, Device], alias_filters: List[Dict[str, str]], point_map: Dict[str, str], hvalues: List[Dict]) -> List[MetricValues]:
+        result = []
+        pid_to_alias = {pid: alias for alias, pid in point_map.items()}
+        alias_to_filter = {af["alias"]: af["filter"] for af in alias_filters}
         for agvalues in hvalues:
-            point_id = agvalues.point_id
-            point_alias = next((alias for alias, pid in point_map.items() if pid == point_id), None)
-            point_filter = next((af["filter"] for af in alias_filters if af["alias"] == point_alias), None)
-            point_values = agvalues.values["avg"]
-
-            if point_values.analog:
-                vals, timestamps = point_values.analog.values, point_values.analog.timestamps
-            elif point_values.discrete:
-                vals, timestamps = point_values.discrete.values, point_values.discrete.timestamps
+            point_alias = pid_to_alias.get(agvalues["point_id"])
+            point_filter = alias_to_filter.get(point_alias)
+            device = alias_to_device[point_alias]
+            point_values = agvalues["values"]["avg"]
+            analog, discrete = point_values.get("analog"), point_values.get("discrete")
+
+            if analog:
+                vals, timestamps = map(float, analog["values"]), analog["timestamps"]
+            elif discrete:
+                vals, timestamps = map(float, discrete["values"]), discrete["timestamps"]
             else:
                vals, timestamps = [], []
 
@@ -163,6 +220,11 @@ class MetricsReader:
                 metric=DeviceMetric(name=point_filter, device_kind=device.kind),
                 device_name=device.name,
                 device_alias=device.alias,
-                values=[MetricValue(timestamp=datetime.fromtimestamp(ts), value=val) for ts, val in zip(timestamps, vals)]
+                values=[
+                    MetricValue(ts, val)
+                    for ts, val in zip(map(datetime.fromtimestamp, timestamps), vals)
+                ]
             )
-            result[facility.short_name].append(metrics_values)
+            result.append(metrics_values)
+
+        return result
@@ -113,11 +113,14 @@ device_metric_mapping = {
     DeviceKind.vessel: VesselMetric
 }
 
+_VALID_METRIC_NAMES = {
+    kind: frozenset(e.value for e in metrics) for kind, metrics in device_metric_mapping.items()
+}
+
 def is_valid_metric(metric: DeviceMetric) -> bool:
     """
     Check if the metric is valid for the given device kind.
     """
     if metric.name != "":
-        valid_metrics = [e.value for e in device_metric_mapping[metric.device_kind]]
-        return metric.name in valid_metrics
+        return metric.name in _VALID_METRIC_NAMES[metric.device_kind]
     return metric.alias_regex != ""
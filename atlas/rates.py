@@ -1,5 +1,5 @@
-from datetime import datetime, timedelta
-import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional
 from pydantic import BaseModel
 from .atlas_client import AtlasClient, HourlyRates
@@ -12,6 +12,8 @@ class RatesReader:
     High level API Client for retrieving energy rates from the ATLAS platform.
     """
 
+    MAX_WORKERS = 8
+
     def __init__(self, refresh_token: Optional[str] = None, debug: Optional[bool] = False):
         """
         Parameters
@@ -50,16 +52,24 @@ class RatesReader:
             Raised if an error occurs.
         """
         facilities = self.client.filter_facilities(filter.facilities)
+        now = datetime.now(timezone.utc)
         if start is None:
-            start = datetime.now() - timedelta(days=1)
+            start = now - timedelta(days=1)
         if end is None:
-            end = datetime.now()
+            end = now
         result = {}
 
-        for f in facilities:
-            try:
-                result[f.short_name] = self.client.get_hourly_rates(f.organization_id, f.agents[0].agent_id, start, end)
-            except Exception as e:
-                raise Exception(f"Error retrieving rates for facility {f.display_name}: {e}")
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            futures = [executor.submit(self._read_facility, f, start, end) for f in facilities]
+            # collect in submission order so results follow the facility order
+            for future in futures:
+                short_name, rates = future.result()
+                result[short_name] = rates
+
+        return result
 
-        return result
\ No newline at end of file
+    def _read_facility(self, f, start: datetime, end: datetime):
+        try:
+            return f.short_name, self.client.get_hourly_rates(f.organization_id, f.agents[0].agent_id, start, end)
+        except Exception as e:
+            raise Exception(f"Error retrieving rates for facility {f.display_name}: {e}")
@@ -0,0 +1,16 @@
+"""
+Command line parsing shared by the examples.
+"""
+import argparse
+
+def parse_args(description: str, facilities: bool = False) -> argparse.Namespace:
+    """
+    Parse the --json and --debug flags common to all examples and, if
+    facilities is True, the facility short names given as arguments.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--json", action="store_true", help="print the output in JSON format")
+    parser.add_argument("--debug", action="store_true", help="enable debug logging")
+    if facilities:
+        parser.add_argument("facilities", nargs="+", metavar="facility", help="facility short name")
+    return parser.parse_intermixed_args()
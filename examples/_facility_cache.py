@@ -0,0 +1,43 @@
+"""
+On-disk cache of the facility list shared by the examples so that repeated
+invocations do not fetch it from the ATLAS API every time.
+"""
+import re
+import time
+from pathlib import Path
+from typing import List
+from pydantic import TypeAdapter
+from atlas import AtlasClient, Facility
+
+CACHE_DIR = Path.home() / ".cache/atlas"
+
+_facilities_adapter = TypeAdapter(List[Facility])
+
+def _cache_file_path(client: AtlasClient) -> Path:
+    """
+    Return the cache file of the logged in user so that switching refresh
+    tokens never serves another account's facilities.
+    """
+    user_id = re.sub(r"[^\w.-]", "_", str(client.client.get_user_id()))
+    return CACHE_DIR / f"facilities-{user_id}.json"
+
+def get_facilities(client: AtlasClient, ttl: float = 60) -> List[Facility]:
+    """
+    Return the facilities the logged in user has access to, read from the
+    user's cache file in CACHE_DIR if it was written less than ttl seconds ago.
+    """
+    cache_file_path = _cache_file_path(client)
+    try:
+        if time.time() - cache_file_path.stat().st_mtime < ttl:
+            return _facilities_adapter.validate_json(cache_file_path.read_bytes())
+    except (OSError, ValueError):
+        # missing or unreadable cache, fall back to the API
+        pass
+
+    facilities = client.list_facilities()
+    try:
+        cache_file_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_file_path.write_bytes(_facilities_adapter.dump_json(facilities))
+    except OSError:
+        pass
+    return facilities
@@ -1,18 +1,15 @@
-import os
 import sys
-import orjson
-from collections import defaultdict
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from operator import attrgetter
 from typing import Dict, List
 from pydantic import BaseModel
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from _cli import parse_args
+from _facility_cache import get_facilities
 from atlas import AtlasClient, Device
 
-class PropertyValue(BaseModel):
-    name: str
-    kind: str
-    bias: str
-    alias: str
-
 class DeviceList(BaseModel):
     by_id: Dict[str, Device]
     by_kind: Dict[str, Dict[str, List[Device]]]
@@ -24,51 +21,68 @@ def list_devices(debug: bool = False) -> DeviceList:
     """
     client = AtlasClient(debug)
     try:
-        facilities = client.list_facilities()
+        facilities = get_facilities(client)
     except Exception as e:
         print(f"Error listing facilities: {e}")
         return {}
 
-    by_kind = {}
-    by_id = {}
-    for facility in sorted(facilities, key=lambda facility: facility.display_name):
-        if not facility.agents:
-            continue
-        device_map = defaultdict(list)
+    def _fetch_facility_devices(facility):
         try:
-            devices = client.list_devices(facility.organization_id, facility.agents[0].agent_id)
+            return facility, client.list_devices(facility.organization_id, facility.agents[0].agent_id)
         except Exception as e:
             print(f"Error listing devices for facility {facility.display_name}: {e}")
-            continue
-        for device in sorted(devices, key=lambda device: device.name):
-            device_map[device.kind].append(device)
-            by_id[device.id] = device
+            return facility, None
 
-        by_kind[facility.display_name] = device_map
+    facilities = sorted((f for f in facilities if f.agents), key=attrgetter("display_name"))
+    by_kind = {}
+    by_id = {}
+    if not facilities:
+        return DeviceList(by_id=by_id, by_kind=by_kind)
+
+    # list devices of all facilities concurrently, map preserves the sort order
+    with ThreadPoolExecutor(max_workers=min(32, len(facilities))) as executor:
+        results = list(executor.map(_fetch_facility_devices, facilities))
+
+    for facility, devices in results:
+        if devices is None:
+            continue
+        by_id.update((device.id, device) for device in devices)
+        devices.sort(key=attrgetter("kind", "name"))
+        by_kind[facility.display_name] = {
+            kind: list(group) for kind, group in groupby(devices, key=attrgetter("kind"))
+        }
 
     return DeviceList(by_id=by_id, by_kind=by_kind)
 
 if __name__ == "__main__":
-    json_output = "--json" in sys.argv
-    debug ="--debug" in sys.argv
+    args = parse_args("List the devices of all facilities the user has access to.")
+    json_output = args.json
+    debug = args.debug
 
     device_list = list_devices(debug)
     by_kind = device_list.by_kind
     by_id = device_list.by_id
 
     if json_output:
-        print(orjson.dumps(by_kind, default=lambda x: x.model_dump() if isinstance(x, BaseModel) else x).decode("utf-8"))
+        from pydantic import TypeAdapter
+        by_kind_adapter = TypeAdapter(Dict[str, Dict[str, List[Device]]])
+        sys.stdout.buffer.write(by_kind_adapter.dump_json(by_kind))
+        sys.stdout.buffer.write(b"\n")
         sys.exit(0)
 
+    lines = []
     for facility_name, facility in by_kind.items():
-        print(f"Facility: {facility_name}")
-        for kind, by_kind in facility.items():
-            print(f"  {kind}:")
-            for device in by_kind:
-                print(f"    {device.name}")
+        lines.append(f"Facility: {facility_name}")
+        for kind, devices in facility.items():
+            lines.append(f"  {kind}:")
+            for device in devices:
+                lines.append(f"    {device.name}")
                 for prop in device.properties:
-                    print(f"      {prop.value.name} ({prop.value.kind} {prop.value.bias}): {prop.value.alias}")
+                    pv = prop.value
+                    lines.append(f"      {pv.name} ({pv.kind} {pv.bias}): {pv.alias}")
                 for up in device.upstream:
-                    print(f"      Upstream: {up.kind} to {by_id[up.device_id].name}")
+                    lines.append(f"      Upstream: {up.kind} to {by_id[up.device_id].name}")
                 for down in device.downstream:
-                    print(f"      Downstream: {down.kind} to {by_id[down.device_id].name}")
+                    lines.append(f"      Downstream: {down.kind} to {by_id[down.device_id].name}")
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
@@ -1,16 +1,21 @@
-import os, sys, orjson
-from pydantic import BaseModel
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from atlas import AtlasClient
+import sys
+from pathlib import Path
+from typing import List
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from _cli import parse_args
+from atlas import AtlasClient, Facility
 
-json_output = "--json" in sys.argv
-debug ="--debug" in sys.argv
+args = parse_args("List the facilities the user has access to.")
+json_output = args.json
+debug = args.debug
 
 client = AtlasClient(debug)
 facilities = client.list_facilities()
 
 if json_output:
-    print(orjson.dumps(facilities, default=lambda x: x.model_dump() if isinstance(x, BaseModel) else x).decode("utf-8"))
+    from pydantic import TypeAdapter
+    sys.stdout.buffer.write(TypeAdapter(List[Facility]).dump_json(facilities))
+    sys.stdout.buffer.write(b"\n")
     sys.exit(0)
 
 for facility in facilities:
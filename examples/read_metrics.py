@@ -1,19 +1,19 @@
-import orjson, os, sys
-from pydantic import BaseModel
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from atlas import MetricsReader, Filter, DeviceMetric, DeviceKind, CompressorMetric
+import sys
+from pathlib import Path
+from typing import Dict, List
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from _cli import parse_args
+from atlas import MetricsReader, Filter, DeviceMetric, DeviceKind, CompressorMetric, MetricValues
 
 """
 This example retrieves the suction pressure and motor current for all
 compressors in the given facilities over the past 10 minutes and prints the
 average values for each minute.
 """
-json_output = "--json" in sys.argv
-debug ="--debug" in sys.argv
-facilities = sys.argv[1:]
-if not facilities:
-    print("Usage: python read_metrics.py <facility1> <facility2> ...")
-    sys.exit(1)
+args = parse_args("Read compressor suction pressure and motor current.", facilities=True)
+json_output = args.json
+debug = args.debug
+facilities = args.facilities
 
 device_kind = DeviceKind.compressor
 metric_name = CompressorMetric.suction_pressure
@@ -24,14 +24,21 @@ filter = Filter(facilities=facilities, metrics=[compressor_suction_pressure, mot
 values = MetricsReader(debug=debug).read(filter)
 
 if json_output:
-    print(orjson.dumps(values, default=lambda x: x.model_dump() if isinstance(x, BaseModel) else x).decode("utf-8"))
+    from pydantic import TypeAdapter
+    values_adapter = TypeAdapter(Dict[str, List[MetricValues]])
+    # newline-delimited JSON, one object per facility
+    for facility, metrics_values in values.items():
+        sys.stdout.buffer.write(values_adapter.dump_json({facility: metrics_values}))
+        sys.stdout.buffer.write(b"\n")
     sys.exit(0)
 
+lines = []
 for facility, metrics_values in values.items():
-    print(facility.capitalize())
+    lines.append(facility.capitalize())
     for metric_values in metrics_values:
         if len(metric_values.values) == 0:
             continue
-        print(f"{metric_values.device_name} {metric_values.metric.name}")
-        for value in metric_values.values:
-            print(f"  {value.timestamp}: {value.value}")
\ No newline at end of file
+        lines.append(f"{metric_values.device_name} {metric_values.metric.name}")
+        lines.extend(f"  {value.timestamp}: {value.value}" for value in metric_values.values)
+if lines:
+    sys.stdout.write("\n".join(lines) + "\n")
@@ -1,34 +1,39 @@
-import os
 import sys
-import orjson
-from datetime import datetime
-from pydantic import BaseModel
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from typing import List
+from pathlib import Path
+import time
+from functools import lru_cache
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from typing import Dict, List
+from _cli import parse_args
 from atlas import RatesReader, RateFilter, HourlyRates
 
+@lru_cache(maxsize=512)
+def _fmt_ts(ts: int) -> str:
+    tm = time.localtime(ts)
+    return f"{tm.tm_year:04d}-{tm.tm_mon:02d}-{tm.tm_mday:02d} {tm.tm_hour:02d}:{tm.tm_min:02d}:{tm.tm_sec:02d}"
+
 def print_rates(title: str, rates: List[HourlyRates]):
     if rates:
         print(title)
         for rate in rates:
-            print(f"  {datetime.fromtimestamp(rate.start).strftime('%Y-%m-%d %H:%M:%S')}: {rate.rate}")
+            print(f"  {_fmt_ts(rate.start)}: {rate.rate}")
 
 """
 This example retrieves the past 24 hours of rates for the given facility and
 prints the rates.
 """
-json_output = "--json" in sys.argv
-debug ="--debug" in sys.argv
-facilities = sys.argv[1:]
-if not facilities:
-    print("Usage: python read_rates.py <facility1> <facility2> ...")
-    sys.exit(1)
+args = parse_args("Read the past 24 hours of energy rates.", facilities=True)
+json_output = args.json
+debug = args.debug
+facilities = args.facilities
 
 filter = RateFilter(facilities=facilities)
 rates = RatesReader(debug=debug).read(filter)
 
 if json_output:
-    print(orjson.dumps(rates, default=lambda x: x.model_dump() if isinstance(x, BaseModel) else x).decode("utf-8"))
+    from pydantic import TypeAdapter
+    sys.stdout.buffer.write(TypeAdapter(Dict[str, HourlyRates]).dump_json(rates))
+    sys.stdout.buffer.write(b"\n")
     sys.exit(0)
 
 for facility, rates in rates.items():